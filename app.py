@@ -7,19 +7,29 @@ import logging
 import re
 import sys
 import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 from flask import Flask, render_template, jsonify, request, abort
+from flask.json.provider import DefaultJSONProvider
 from flask_caching import Cache
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from apscheduler.schedulers.background import BackgroundScheduler
 
+try:
+    import orjson
+except ImportError:  # optional speed-up; stdlib json is used without it
+    orjson = None
+
 # Local imports
 sys.path.insert(0, os.path.dirname(__file__))
 from config import Config
 from services.weather_service import build_weather_payload
-from services.ml_service import run_full_analysis
+from services.ml_service import run_full_analysis, preload_models
 from services.risk_service import compute_all_risks
 from services.outfit_service import get_outfit_products
 from services.city_service import get_city_content
@@ -34,11 +44,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Letters, spaces, hyphens, apostrophes, commas (for "city, country"), periods
+_CITY_RE = re.compile(r"[A-Za-zÀ-ÿ\s\-',\.]{1,80}")
+
+# ─── JSON ──────────────────────────────────────────────────────────────────
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (much faster on float-heavy payloads)."""
+
+    _OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 # ─── App Factory ───────────────────────────────────────────────────────────
 
 def create_app(config_name: str = 'default') -> Flask:
     app = Flask(__name__, template_folder='templates', static_folder='static')
     app.config.from_object(Config)
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
 
     # Extensions
     cache = Cache(app)
@@ -46,15 +75,43 @@ def create_app(config_name: str = 'default') -> Flask:
         key_func=get_remote_address,
         app=app,
         default_limits=['200 per day', '60 per hour'],
-        storage_uri='memory://',
+        storage_uri=app.config['RATELIMIT_STORAGE_URL'],
+        strategy=app.config['RATELIMIT_STRATEGY'],
     )
 
     # Background scheduler for auto-refresh
     scheduler = BackgroundScheduler(timezone='UTC')
     scheduler.start()
 
-    # Store last update times
-    app.last_updates = {}
+    # Thread pool for the independent outbound fetches made per weather request
+    io_pool = ThreadPoolExecutor(max_workers=Config.IO_POOL_WORKERS, thread_name_prefix='wx-io')
+
+    # Warm ML models at boot so the first request doesn't block on training
+    try:
+        preload_models()
+    except Exception as e:
+        logger.error(f"ML model preload failed: {e}")
+
+    # Last successful fetch per city (epoch seconds), oldest evicted first
+    app.last_updates = OrderedDict()
+    last_updates_lock = threading.Lock()
+
+    def record_last_update(city_key: str) -> None:
+        with last_updates_lock:
+            app.last_updates[city_key] = time.time()
+            app.last_updates.move_to_end(city_key)
+            if len(app.last_updates) > Config.LAST_UPDATES_MAX:
+                app.last_updates.popitem(last=False)
+
+    def prune_last_updates() -> None:
+        """Drop cities not fetched within LAST_UPDATES_TTL_HOURS (oldest are first)."""
+        cutoff = time.time() - Config.LAST_UPDATES_TTL_HOURS * 3600
+        with last_updates_lock:
+            while app.last_updates and next(iter(app.last_updates.values())) < cutoff:
+                app.last_updates.popitem(last=False)
+
+    scheduler.add_job(prune_last_updates, 'interval', minutes=Config.LAST_UPDATES_PRUNE_MINUTES,
+                      id='prune_last_updates', replace_existing=True)
 
     # ─── Helper: Input Sanitization ────────────────────────────────────────
 
@@ -62,8 +119,7 @@ def create_app(config_name: str = 'default') -> Flask:
         if not city:
             return None
         city = city.strip()
-        # Allow letters, spaces, hyphens, apostrophes, commas (for "city, country")
-        if not re.match(r"^[A-Za-zÀ-ÿ\s\-',\.]{1,80}$", city):
+        if not _CITY_RE.fullmatch(city):
             return None
         return city[:80]
 
@@ -85,39 +141,47 @@ def create_app(config_name: str = 'default') -> Flask:
 
         logger.info(f"Weather request for city: {city}")
 
-        # 1. Fetch weather data
-        weather = build_weather_payload(city)
+        # 1. Fetch weather data; city content (network-bound) starts as soon as
+        #    geocoding resolves, overlapping the forecast fetch and ML/risk work
+        city_futures = []
+
+        def start_city_content(geo):
+            city_futures.append(io_pool.submit(get_city_content, geo['name'], geo['country']))
+
+        weather = build_weather_payload(city, on_geocoded=start_city_content)
         if not weather:
             return jsonify({'error': f'City "{city}" not found or weather data unavailable.', 'code': 'CITY_NOT_FOUND'}), 404
 
-        # 2. ML Analysis
+        # 2. City Content
+        city_future = city_futures[0]
+
+        # 3. ML Analysis
         try:
             ml_analysis = run_full_analysis(weather)
         except Exception as e:
             logger.error(f"ML analysis failed: {e}")
             ml_analysis = {'error': 'ML analysis unavailable'}
 
-        # 3. Risk Index
+        # 4. Outfit Products — depends on the ML clothing pick, also network-bound
+        clothing_primary = ml_analysis.get('clothing', {}).get('primary', 'T-Shirt')
+        temp = weather['current']['temperature']
+        products_future = io_pool.submit(get_outfit_products, clothing_primary, temp)
+
+        # 5. Risk Index
         try:
             risks = compute_all_risks(weather['current'])
         except Exception as e:
             logger.error(f"Risk computation failed: {e}")
             risks = {}
 
-        # 4. Outfit Products
         try:
-            clothing_primary = ml_analysis.get('clothing', {}).get('primary', 'T-Shirt')
-            temp = weather['current']['temperature']
-            products = get_outfit_products(clothing_primary, temp)
+            products = products_future.result(timeout=Config.CONTENT_WAIT_TIMEOUT)
         except Exception as e:
             logger.error(f"Outfit fetch failed: {e}")
             products = []
 
-        # 5. City Content
         try:
-            city_name = weather['city']['name']
-            country = weather['city']['country']
-            city_content = get_city_content(city_name, country)
+            city_content = city_future.result(timeout=Config.CONTENT_WAIT_TIMEOUT)
         except Exception as e:
             logger.error(f"City content fetch failed: {e}")
             city_content = {'name': city, 'description': '', 'images': [], 'tourist_spots': []}
@@ -128,7 +192,7 @@ def create_app(config_name: str = 'default') -> Flask:
         theme = get_theme(category_key, icon_key)
 
         # Update timestamp
-        app.last_updates[city.lower()] = datetime.now(timezone.utc).isoformat()
+        record_last_update(city.lower())
 
         return jsonify({
             'status': 'success',
@@ -155,10 +219,9 @@ def create_app(config_name: str = 'default') -> Flask:
         ts = app.last_updates.get(city.lower())
         if not ts:
             return jsonify({'minutes_ago': None, 'timestamp': None})
-        last_dt = datetime.fromisoformat(ts)
-        now = datetime.now(timezone.utc)
-        delta_minutes = int((now - last_dt).total_seconds() / 60)
-        return jsonify({'minutes_ago': delta_minutes, 'timestamp': ts})
+        delta_minutes = int((time.time() - ts) / 60)
+        iso = datetime.fromtimestamp(ts, timezone.utc).isoformat()
+        return jsonify({'minutes_ago': delta_minutes, 'timestamp': iso})
 
     @app.route('/health')
     def health():
@@ -4,23 +4,38 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'wx-intel-secret-2024-change-in-prod')
     DEBUG = os.environ.get('DEBUG', 'False').lower() == 'true'
 
+    # Shared Redis (cache + rate limits across workers); unset → per-process memory
+    REDIS_URL = os.environ.get('REDIS_URL')
+
     # Caching
-    CACHE_TYPE = 'SimpleCache'
+    CACHE_TYPE = 'RedisCache' if REDIS_URL else 'SimpleCache'
+    CACHE_REDIS_URL = REDIS_URL
+    CACHE_KEY_PREFIX = 'wx_'
     CACHE_DEFAULT_TIMEOUT = 600  # 10 minutes
 
     # Rate limiting
     RATELIMIT_DEFAULT = '60 per minute'
-    RATELIMIT_STORAGE_URL = 'memory://'
+    RATELIMIT_STORAGE_URL = REDIS_URL or 'memory://'
+    RATELIMIT_STRATEGY = 'moving-window'  # no double bursts at fixed-window edges
 
     # Weather data sources
     WTTR_BASE_URL = 'https://wttr.in'
     OPEN_METEO_URL = 'https://api.open-meteo.com/v1/forecast'
     GEOCODING_URL = 'https://geocoding-api.open-meteo.com/v1/search'
 
+    # In-process TTL caches for upstream lookups (seconds / max entries)
+    GEOCODE_CACHE_TTL = 86400
+    GEOCODE_CACHE_SIZE = 1024
+    WEATHER_CACHE_TTL = 600
+    WEATHER_CACHE_SIZE = 1024
+
     # Scraping
     REQUEST_TIMEOUT = 10
     REQUEST_RETRIES = 3
     REQUEST_BACKOFF = 1.5
+    IO_POOL_WORKERS = 8  # concurrent outbound fetches per process
+    BATCH_FANOUT = 16  # max cities fetched at once by build_many (Open-Meteo rate limits)
+    CONTENT_WAIT_TIMEOUT = 15  # seconds to wait on pooled scraping work before using defaults
 
     HEADERS = {
         'User-Agent': (
@@ -32,9 +47,17 @@ class Config:
         'Accept': 'application/json,text/html,application/xhtml+xml',
     }
 
+    # ML model artifacts (trained weights cached across process restarts)
+    MODEL_CACHE_DIR = os.environ.get(
+        'MODEL_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+    )
+
     # Scheduler
     SCHEDULER_TIMEZONE = 'UTC'
     BACKGROUND_REFRESH_MINUTES = 10
+    LAST_UPDATES_MAX = 10000  # cities tracked by /api/last-updated
+    LAST_UPDATES_TTL_HOURS = 24
+    LAST_UPDATES_PRUNE_MINUTES = 5
 
 
 class DevelopmentConfig(Config):
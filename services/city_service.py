@@ -6,61 +6,104 @@ Uses Wikipedia and Unsplash for image data.
 
 import logging
 import re
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Shared keep-alive session: repeat Wikipedia calls skip the TCP/TLS handshake
+_SESSION = requests.Session()
+_SESSION.headers.update(Config.HEADERS)
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    # Retry transient statuses, but spend at most one extra attempt on a
+    # connect failure and none on read timeouts: each of those already cost a
+    # full timeout, and /api/weather waits on this. Retry-After is ignored so a
+    # 429/503 can't stall the call beyond the capped backoff.
+    max_retries=Retry(
+        total=Config.REQUEST_RETRIES,
+        connect=1,
+        read=0,
+        backoff_factor=Config.REQUEST_BACKOFF,
+        backoff_max=Config.REQUEST_BACKOFF * 2,
+        respect_retry_after_header=False,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({'GET'}),
+    ),
+))
+
+# Summary and tourist-spot lookups are independent, so they run side by side;
+# two slots per get_city_content call, so this serves as many concurrent
+# requests as the app's IO_POOL_WORKERS-sized pool that calls it
+_POOL = ThreadPoolExecutor(max_workers=Config.IO_POOL_WORKERS * 2, thread_name_prefix='city')
+
+# XPath equivalent of the CSS selector '.mw-search-result-heading a'
+_SEARCH_HEADING_XPATH = (
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' mw-search-result-heading ')]//a"
+)
+
+# Result titles that look like attractions even without the city name in them
+_SPOT_RE = re.compile(r'park|museum|palace|tower|bridge|temple|cathedral|garden', re.IGNORECASE)
+
+
+@lru_cache(maxsize=2048)
+def _fetch_summary(city: str) -> str | None:
+    """
+    Memoized Wikipedia summary lookup. Network errors propagate (and so are
+    not cached); a missing article is a definitive answer and is cached.
+    """
+    url = 'https://en.wikipedia.org/api/rest_v1/page/summary/' + requests.utils.quote(city)
+    resp = _SESSION.get(url, timeout=8)
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+
+    extract = resp.json().get('extract', '')
+    if not extract:
+        return None
+    # Return first 3–5 sentences
+    sentences = re.split(r'(?<=[.!?]) +', extract)
+    return ' '.join(sentences[:5])
+
 
 def _wikipedia_summary(city: str, country: str = '') -> str | None:
     """Fetch city description from Wikipedia API."""
-    query = f"{city} {country}".strip()
-    url = 'https://en.wikipedia.org/api/rest_v1/page/summary/' + requests.utils.quote(city)
-
     try:
-        resp = requests.get(url, headers=Config.HEADERS, timeout=8)
-        if resp.status_code == 200:
-            data = resp.json()
-            extract = data.get('extract', '')
-            if extract:
-                # Return first 3–5 sentences
-                sentences = re.split(r'(?<=[.!?]) +', extract)
-                return ' '.join(sentences[:5])
+        return _fetch_summary(city)
     except Exception as e:
         logger.debug(f"Wikipedia fetch failed for {city}: {e}")
 
     return None
 
 
-def _get_city_images(city: str) -> list[dict]:
+_IMAGE_KEYWORDS = ('skyline', 'cityscape', 'architecture', 'landmark')
+
+
+@lru_cache(maxsize=4096)
+def _get_city_images(city: str) -> tuple[dict, ...]:
     """
     Get city skyline images via Unsplash source (no API key required).
-    Returns list of image objects with url and credit.
+    Returns image objects with url and credit; memoized since the output
+    depends only on the city name, so treat the result as read-only.
     """
-    # Use Unsplash Source API for curated city images
-    keywords = [
-        f'{city} skyline',
-        f'{city} cityscape',
-        f'{city} architecture',
-        f'{city} landmark',
-    ]
-    images = []
-    seen_urls = set()
-
-    for kw in keywords[:4]:
-        slug = kw.replace(' ', ',').lower()
-        url = f'https://source.unsplash.com/featured/800x500?{requests.utils.quote(slug)}'
-        # Add slight variation to avoid duplicate cache hits
-        if url not in seen_urls:
-            seen_urls.add(url)
-            images.append({
-                'url': url,
-                'alt': kw,
-                'credit': 'Unsplash',
-            })
-
-    return images
+    # Use Unsplash Source API for curated city images; quote() is per-character,
+    # so the city slug is quoted once and each keyword appended ('%2C' is ',').
+    city_slug = requests.utils.quote(city.replace(' ', ',').lower())
+    return tuple(
+        {
+            'url': f'https://source.unsplash.com/featured/800x500?{city_slug}%2C{kw}',
+            'alt': f'{city} {kw}',
+            'credit': 'Unsplash',
+        }
+        for kw in _IMAGE_KEYWORDS
+    )
 
 
 def _get_tourist_spots(city: str, country: str = '') -> list[str]:
@@ -72,18 +115,19 @@ def _get_tourist_spots(city: str, country: str = '') -> list[str]:
     search_url = f'https://en.wikipedia.org/w/index.php?search={requests.utils.quote(query)}&ns0=1'
 
     spots = []
+    city_lower = city.lower()
     try:
-        resp = requests.get(search_url, headers=Config.HEADERS, timeout=8)
+        resp = _SESSION.get(search_url, timeout=8)
         if resp.status_code != 200:
             return _fallback_tourist_spots(city)
 
-        soup = BeautifulSoup(resp.text, 'lxml')
+        tree = lxml.html.fromstring(resp.content)
 
-        # Grab first few list items from mw-search-results or mw-content-text
-        items = soup.select('.mw-search-result-heading a')
+        # Grab first few result headings from mw-search-results
+        items = tree.xpath(_SEARCH_HEADING_XPATH)
         for item in items[:6]:
-            name = item.get_text(strip=True)
-            if city.lower() in name.lower() or any(w in name.lower() for w in ['park', 'museum', 'palace', 'tower', 'bridge', 'temple', 'cathedral', 'garden']):
+            name = item.text_content().strip()
+            if city_lower in name.lower() or _SPOT_RE.search(name) is not None:
                 spots.append(name)
             if len(spots) >= 5:
                 break
@@ -119,7 +163,17 @@ def get_city_content(city: str, country: str = '') -> dict:
     """
     Main entry: returns full city content payload.
     """
-    description = _wikipedia_summary(city, country)
+    desc_future = _POOL.submit(_wikipedia_summary, city, country)
+    spots_future = _POOL.submit(_get_tourist_spots, city, country)
+
+    # One shared deadline for both waits: if the pool is backed up or Wikipedia
+    # is slow, fall back to the generic description / spots instead
+    deadline = time.monotonic() + Config.CONTENT_WAIT_TIMEOUT
+    try:
+        description = desc_future.result(timeout=Config.CONTENT_WAIT_TIMEOUT)
+    except Exception as e:
+        logger.debug(f"Wikipedia summary timed out for {city}: {e}")
+        description = None
     if not description:
         description = (
             f"{city} is a vibrant and culturally rich city known for its unique blend "
@@ -129,8 +183,12 @@ def get_city_content(city: str, country: str = '') -> dict:
             f"millions of visitors each year."
         )
 
-    images = _get_city_images(city)
-    tourist_spots = _get_tourist_spots(city, country)
+    images = list(_get_city_images(city))
+    try:
+        tourist_spots = spots_future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except Exception as e:
+        logger.debug(f"Tourist spots timed out for {city}: {e}")
+        tourist_spots = _fallback_tourist_spots(city)
 
     return {
         'name': city,
@@ -5,12 +5,16 @@ Zero dependency on scikit-learn or pandas — fully Python 3.14 compatible.
 
 Implements from scratch:
   - Linear Regression  (Normal Equation + R²)
-  - Logistic Regression (Softmax, gradient descent)
+  - Logistic Regression (Softmax, Newton / IRLS)
   - KMeans Clustering  (k-means++ initialisation)
 """
 
-import numpy as np
+import os
 import logging
+import threading
+from bisect import bisect_right
+import numpy as np
+from config import Config
 
 logger = logging.getLogger(__name__)
 
@@ -45,25 +49,26 @@ class LinearRegression:
     def __init__(self):
         self.coef_ = None
         self.intercept_ = None
-        self._w = None
 
     def fit(self, X, y):
-        n = X.shape[0]
-        Xb = np.hstack([np.ones((n, 1)), X])
+        # Solve on centred data and recover the intercept analytically, so no
+        # ones column has to be stacked onto X.
+        x_mean = X.mean(axis=0)
+        y_mean = float(y.mean())
+        Xc = X - x_mean
+        yc = y - y_mean
         lam = 1e-8
-        A = Xb.T @ Xb + lam * np.eye(Xb.shape[1])
-        b = Xb.T @ y
+        A = Xc.T @ Xc + lam * np.eye(X.shape[1])
+        b = Xc.T @ yc
         try:
-            self._w = np.linalg.solve(A, b)
+            self.coef_ = np.linalg.solve(A, b)
         except np.linalg.LinAlgError:
-            self._w = np.linalg.lstsq(Xb, y, rcond=None)[0]
-        self.intercept_ = float(self._w[0])
-        self.coef_ = self._w[1:]
+            self.coef_ = np.linalg.lstsq(Xc, yc, rcond=None)[0]
+        self.intercept_ = y_mean - float(x_mean @ self.coef_)
         return self
 
     def predict(self, X):
-        Xb = np.hstack([np.ones((X.shape[0], 1)), X])
-        return Xb @ self._w
+        return X @ self.coef_ + self.intercept_
 
     def score(self, X, y):
         y_pred = self.predict(X)
@@ -73,7 +78,7 @@ class LinearRegression:
 
 
 # ════════════════════════════════════════════════════════════════════════════
-#  LOGISTIC REGRESSION  (Softmax + gradient descent)
+#  LOGISTIC REGRESSION  (Softmax + Newton / IRLS)
 # ════════════════════════════════════════════════════════════════════════════
 
 def _softmax(Z):
@@ -83,38 +88,54 @@ def _softmax(Z):
 
 
 class LogisticRegression:
-    def __init__(self, max_iter=400, lr=0.5, lam=1e-4):
+    def __init__(self, max_iter=25, lam=1e-4, tol=1e-8):
         self.max_iter = max_iter
-        self.lr = lr
         self.lam = lam
-        self.W = None
+        self.tol = tol
+        self.W = None  # (d, K) feature weights
+        self.b = None  # (K,) per-class bias
         self.classes_ = None
 
     def fit(self, X, y):
         n, d = X.shape
-        self.classes_ = np.unique(y)
+        self.classes_, y_idx = np.unique(y, return_inverse=True)
         K = len(self.classes_)
-        label_to_idx = {c: i for i, c in enumerate(self.classes_)}
-        y_idx = np.array([label_to_idx[c] for c in y])
 
         Y = np.zeros((n, K))
         Y[np.arange(n), y_idx] = 1.0
 
+        self.W = np.zeros((d, K))
+        self.b = np.zeros(K)
+
+        # The Hessian couples bias and weights, so it is built over [1, X]
+        # once here; logits and gradients still use the split form.
         Xb = np.hstack([np.ones((n, 1)), X])
-        rng = np.random.default_rng(42)
-        self.W = rng.normal(0, np.sqrt(2.0 / (d + K)), (d + 1, K))
+        # L2 penalty on weights only (not the bias); the tiny jitter keeps
+        # the Hessian invertible despite softmax's shift-invariance.
+        reg = np.concatenate([[0.0], np.full(d, self.lam)])
+        ridge = np.diag(np.repeat(reg, K)) + 1e-8 * np.eye((d + 1) * K)
+        eye_k = np.eye(K)
 
+        # Newton / IRLS: quadratic convergence, typically ~10 steps
         for _ in range(self.max_iter):
-            P = _softmax(Xb @ self.W)
-            grad = Xb.T @ (P - Y) / n
-            grad[1:] += self.lam * self.W[1:]
-            self.W -= self.lr * grad
+            P = _softmax(X @ self.W + self.b)
+            R = P - Y
+            grad_W = X.T @ R / n + self.lam * self.W
+            grad_b = R.mean(axis=0)
+            if max(np.abs(grad_W).max(), np.abs(grad_b).max()) < self.tol:
+                break
+            S = P[:, :, np.newaxis] * (eye_k - P[:, np.newaxis, :])
+            H = np.einsum('ni,nj,nab->iajb', Xb, Xb, S, optimize=True).reshape(
+                (d + 1) * K, (d + 1) * K) / n
+            grad = np.vstack([grad_b, grad_W]).ravel()
+            step = np.linalg.solve(H + ridge, grad).reshape(d + 1, K)
+            self.b -= step[0]
+            self.W -= step[1:]
 
         return self
 
     def predict_proba(self, X):
-        Xb = np.hstack([np.ones((X.shape[0], 1)), X])
-        return _softmax(Xb @ self.W)
+        return _softmax(X @ self.W + self.b)
 
     def predict(self, X):
         return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -124,6 +145,15 @@ class LogisticRegression:
 #  KMEANS  (k-means++ init + Lloyd's algorithm)
 # ════════════════════════════════════════════════════════════════════════════
 
+def _sq_distances(X, centers, x_sq=None):
+    """Pairwise squared distances via ||x||² + ||c||² - 2·x·c (single GEMM)."""
+    if x_sq is None:
+        x_sq = np.einsum('ij,ij->i', X, X)
+    c_sq = np.einsum('ij,ij->i', centers, centers)
+    dists_sq = x_sq[:, np.newaxis] + c_sq[np.newaxis, :] - 2.0 * (X @ centers.T)
+    return np.maximum(dists_sq, 0.0)
+
+
 class KMeans:
     def __init__(self, n_clusters=4, max_iter=100, n_init=3, random_state=0):
         self.n_clusters = n_clusters
@@ -137,24 +167,23 @@ class KMeans:
     def _init_centers(self, X, rng):
         n = X.shape[0]
         idx = rng.integers(0, n)
-        centers = [X[idx].copy()]
-        for _ in range(1, self.n_clusters):
-            dists = np.array([
-                min(float(np.sum((x - c) ** 2)) for c in centers)
-                for x in X
-            ])
-            probs = dists / (dists.sum() + 1e-12)
-            idx = rng.choice(n, p=probs)
-            centers.append(X[idx].copy())
-        return np.array(centers)
+        centers = np.empty((self.n_clusters, X.shape[1]))
+        centers[0] = X[idx]
+        # Squared distance from each point to its nearest chosen seed so far
+        closest_sq = np.sum((X - centers[0]) ** 2, axis=1)
+        for k in range(1, self.n_clusters):
+            probs = closest_sq / (closest_sq.sum() + 1e-12)
+            centers[k] = X[rng.choice(n, p=probs)]
+            np.minimum(closest_sq, np.sum((X - centers[k]) ** 2, axis=1), out=closest_sq)
+        return centers
 
     def _run_once(self, X, rng):
         centers = self._init_centers(X, rng)
         labels = np.zeros(X.shape[0], dtype=int)
+        x_sq = np.einsum('ij,ij->i', X, X)
 
         for _ in range(self.max_iter):
-            diff = X[:, np.newaxis, :] - centers[np.newaxis, :, :]
-            dists_sq = np.sum(diff ** 2, axis=2)
+            dists_sq = _sq_distances(X, centers, x_sq)
             new_labels = np.argmin(dists_sq, axis=1)
             if np.array_equal(new_labels, labels):
                 break
@@ -164,10 +193,7 @@ class KMeans:
                 if len(members):
                     centers[k] = members.mean(axis=0)
 
-        inertia = float(np.sum(np.min(
-            np.sum((X[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2, axis=2),
-            axis=1
-        )))
+        inertia = float(np.sum(np.min(_sq_distances(X, centers, x_sq), axis=1)))
         return centers, labels, inertia
 
     def fit(self, X):
@@ -183,55 +209,56 @@ class KMeans:
         return self
 
     def predict(self, X):
-        diff = X[:, np.newaxis, :] - self.cluster_centers_[np.newaxis, :, :]
-        dists_sq = np.sum(diff ** 2, axis=2)
-        return np.argmin(dists_sq, axis=1)
+        return np.argmin(_sq_distances(X, self.cluster_centers_), axis=1)
 
 
 # ════════════════════════════════════════════════════════════════════════════
 #  CATEGORY & CLOTHING LOGIC
 # ════════════════════════════════════════════════════════════════════════════
 
+# Lower bounds of every category after the first, in ascending order
+_CATEGORY_BOUNDS = (5, 15, 25, 30, 35)
+
 CATEGORIES = [
-    ('extreme_cold', 'Extreme Cold', lambda t: t < 5),
-    ('cold',         'Cold',         lambda t: 5  <= t < 15),
-    ('normal',       'Normal',       lambda t: 15 <= t < 25),
-    ('warm',         'Warm',         lambda t: 25 <= t < 30),
-    ('hot',          'Hot',          lambda t: 30 <= t < 35),
-    ('extreme_hot',  'Extreme Hot',  lambda t: t >= 35),
+    ('extreme_cold', 'Extreme Cold'),   # t < 5
+    ('cold',         'Cold'),           # 5  <= t < 15
+    ('normal',       'Normal'),         # 15 <= t < 25
+    ('warm',         'Warm'),           # 25 <= t < 30
+    ('hot',          'Hot'),            # 30 <= t < 35
+    ('extreme_hot',  'Extreme Hot'),    # t >= 35
 ]
 
 
 def classify_temperature(temp):
-    for key, label, fn in CATEGORIES:
-        if fn(temp):
-            return {'key': key, 'label': label}
-    return {'key': 'normal', 'label': 'Normal'}
+    key, label = CATEGORIES[bisect_right(_CATEGORY_BOUNDS, temp)]
+    return {'key': key, 'label': label}
+
+
+# Effective-temperature upper bounds for each clothing bucket (last is open-ended)
+_CLOTHING_BOUNDS = (5, 10, 20, 25, 30, 35)
+
+_CLOTHING_RULES = (
+    ('Heavy Jacket + Thermal Sweater',
+     ('Thermal base layer', 'Heavy insulated jacket', 'Wool sweater', 'Scarf & gloves', 'Warm boots')),
+    ('Heavy Jacket',
+     ('Fleece sweater', 'Heavy jacket', 'Jeans or warm pants', 'Warm socks')),
+    ('Light Jacket',
+     ('Light jacket or hoodie', 'Long-sleeve shirt', 'Comfortable trousers')),
+    ('Full Sleeve Shirt',
+     ('Long-sleeve shirt or light sweater', 'Jeans or chinos')),
+    ('T-Shirt & Jeans',
+     ('T-shirt', 'Light jeans or shorts', 'Sneakers')),
+    ('Light Cotton Wear',
+     ('Breathable cotton t-shirt', 'Shorts or light trousers', 'Sunglasses')),
+    ('Summer Wear',
+     ('Lightweight linen/cotton', 'Shorts', 'Sun hat', 'Sunglasses', 'Sunscreen')),
+)
 
 
 def clothing_from_temp(temp, wind=0, humidity=50):
     eff = temp - wind * 0.05
-    if eff < 5:
-        primary = 'Heavy Jacket + Thermal Sweater'
-        items = ['Thermal base layer', 'Heavy insulated jacket', 'Wool sweater', 'Scarf & gloves', 'Warm boots']
-    elif eff < 10:
-        primary = 'Heavy Jacket'
-        items = ['Fleece sweater', 'Heavy jacket', 'Jeans or warm pants', 'Warm socks']
-    elif eff < 20:
-        primary = 'Light Jacket'
-        items = ['Light jacket or hoodie', 'Long-sleeve shirt', 'Comfortable trousers']
-    elif eff < 25:
-        primary = 'Full Sleeve Shirt'
-        items = ['Long-sleeve shirt or light sweater', 'Jeans or chinos']
-    elif eff < 30:
-        primary = 'T-Shirt & Jeans'
-        items = ['T-shirt', 'Light jeans or shorts', 'Sneakers']
-    elif eff < 35:
-        primary = 'Light Cotton Wear'
-        items = ['Breathable cotton t-shirt', 'Shorts or light trousers', 'Sunglasses']
-    else:
-        primary = 'Summer Wear'
-        items = ['Lightweight linen/cotton', 'Shorts', 'Sun hat', 'Sunglasses', 'Sunscreen']
+    primary, items = _CLOTHING_RULES[bisect_right(_CLOTHING_BOUNDS, eff)]
+    items = list(items)
     if humidity > 75 and temp > 20:
         items.append('Moisture-wicking fabric recommended')
     return {'primary': primary, 'items': items}
@@ -259,13 +286,15 @@ def predict_temperature_trend(hourly_temps):
     model.fit(X, temps)
 
     confidence = max(0.0, min(1.0, model.score(X, temps)))
-    future_X = np.arange(len(temps), len(temps) + 12, dtype=float).reshape(-1, 1)
-    future_preds = model.predict(future_X).tolist()
+    slope = float(model.coef_[0])
+    future_x = np.arange(len(temps), len(temps) + 12, dtype=float)
+    future_preds = (slope * future_x + model.intercept_).tolist()
 
+    # O(n) rolling mean via cumulative sums (same as a 'valid' convolution)
     window = min(6, len(temps))
-    smoothed = np.convolve(temps, np.ones(window) / window, mode='valid').tolist()
+    csum = np.concatenate([[0.0], np.cumsum(temps)])
+    smoothed = ((csum[window:] - csum[:-window]) / window).tolist()
 
-    slope = float(model.coef_[0])
     trend_dir = 'rising' if slope > 0.15 else ('falling' if slope < -0.15 else 'stable')
 
     return {
@@ -280,6 +309,52 @@ def predict_temperature_trend(hourly_temps):
     }
 
 
+# ════════════════════════════════════════════════════════════════════════════
+#  MODEL ARTIFACT CACHE  (trained weights persisted as .npz)
+# ════════════════════════════════════════════════════════════════════════════
+
+# Bump whenever training data, hyper-parameters or model maths change so stale
+# artifacts from a previous deploy are ignored.
+_MODEL_VERSION = 'v2'
+
+
+def _artifact_path(name):
+    return os.path.join(Config.MODEL_CACHE_DIR, f'{name}_{_MODEL_VERSION}.npz')
+
+
+def _load_artifact(name):
+    path = _artifact_path(name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            return {k: data[k] for k in data.files}
+    except Exception as e:
+        logger.warning(f"Could not load model artifact {path}: {e}")
+        return None
+
+
+def _save_artifact(name, **arrays):
+    path = _artifact_path(name)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)  # atomic, so concurrent workers never read a partial file
+    except Exception as e:
+        logger.warning(f"Could not save model artifact {path}: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _scaler_from(mean, std):
+    scaler = StandardScaler()
+    scaler.mean_ = mean
+    scaler.std_ = std
+    return scaler
+
+
 # ════════════════════════════════════════════════════════════════════════════
 #  LOGISTIC REGRESSION: Clothing prediction — module-level cache
 # ════════════════════════════════════════════════════════════════════════════
@@ -289,8 +364,14 @@ _CLOTHING_LABELS = [
     'Full Sleeve Shirt', 'T-Shirt & Jeans', 'Light Cotton', 'Summer Wear',
 ]
 
+# Training labels use the same buckets as the rule-based clothing_from_temp
+_CLOTHING_THRESHOLDS = np.array(_CLOTHING_BOUNDS, dtype=float)
+
 _log_model = None
 _log_scaler = None
+_log_W_scaled = None     # (3, K) weights with the scaler folded in
+_log_bias_scaled = None  # (K,) matching bias
+_log_lock = threading.Lock()
 
 
 def _build_clothing_data():
@@ -299,41 +380,59 @@ def _build_clothing_data():
     temps = rng.uniform(-10, 45, n)
     humidity = rng.uniform(10, 100, n)
     wind = rng.uniform(0, 80, n)
-    labels = []
-    for t, h, w in zip(temps, humidity, wind):
-        eff = t - w * 0.05
-        if   eff <  5:  labels.append(0)
-        elif eff < 10:  labels.append(1)
-        elif eff < 20:  labels.append(2)
-        elif eff < 25:  labels.append(3)
-        elif eff < 30:  labels.append(4)
-        elif eff < 35:  labels.append(5)
-        else:           labels.append(6)
-    return np.column_stack([temps, humidity, wind]), np.array(labels)
+    eff = temps - wind * 0.05
+    labels = np.searchsorted(_CLOTHING_THRESHOLDS, eff, side='right').astype(np.int64)
+    return np.column_stack([temps, humidity, wind]), labels
 
 
 def _get_logistic_model():
-    global _log_model, _log_scaler
-    if _log_model is None:
-        logger.info("Training Logistic Regression...")
-        X, y = _build_clothing_data()
-        _log_scaler = StandardScaler()
-        Xs = _log_scaler.fit_transform(X)
-        _log_model = LogisticRegression(max_iter=400, lr=0.5, lam=1e-4)
-        _log_model.fit(Xs, y)
-        logger.info("Logistic Regression ready.")
+    global _log_model, _log_scaler, _log_W_scaled, _log_bias_scaled
+    if _log_W_scaled is not None:
+        return _log_model, _log_scaler
+    with _log_lock:
+        if _log_W_scaled is not None:
+            return _log_model, _log_scaler
+
+        # Built in locals and published last: _log_W_scaled is the readiness
+        # guard, so it is assigned only after everything else is in place
+        cached = _load_artifact('logistic')
+        if cached is not None:
+            scaler = _scaler_from(cached['mean'], cached['std'])
+            model = LogisticRegression()
+            model.W = cached['W']
+            model.b = cached['b']
+            model.classes_ = cached['classes']
+            logger.info("Logistic Regression loaded from cache.")
+        else:
+            logger.info("Training Logistic Regression...")
+            X, y = _build_clothing_data()
+            scaler = StandardScaler()
+            Xs = scaler.fit_transform(X)
+            model = LogisticRegression(max_iter=25, lam=1e-4)
+            model.fit(Xs, y)
+            _save_artifact('logistic', W=model.W, b=model.b, classes=model.classes_,
+                           mean=scaler.mean_, std=scaler.std_)
+            logger.info("Logistic Regression ready.")
+
+        # Fold the scaler into the weights: ((x - m) / s) @ W + b == x @ W' + b'
+        W_scaled = model.W / scaler.std_[:, np.newaxis]
+        bias_scaled = model.b - (scaler.mean_ / scaler.std_) @ model.W
+
+        _log_model, _log_scaler, _log_bias_scaled = model, scaler, bias_scaled
+        _log_W_scaled = W_scaled
     return _log_model, _log_scaler
 
 
 def predict_clothing_logistic(temp, humidity, wind):
-    model, scaler = _get_logistic_model()
-    feat = scaler.transform(np.array([[temp, humidity, wind]]))
-    proba = model.predict_proba(feat)[0]
-    pred_class = int(np.argmax(proba))
+    _get_logistic_model()
+    logits = np.array([temp, humidity, wind]) @ _log_W_scaled + _log_bias_scaled
+    pred_class = int(np.argmax(logits))
+    exp = np.exp(logits - logits[pred_class])
+    confidence = 1.0 / exp.sum()  # softmax probability of the arg-max class
     return {
         'clothing_category': _CLOTHING_LABELS[pred_class],
         'class_index': pred_class,
-        'confidence': round(float(proba[pred_class]) * 100, 1),
+        'confidence': round(float(confidence) * 100, 1),
     }
 
 
@@ -352,30 +451,54 @@ _KMEANS_CENTERS_RAW = np.array([
 
 _km_model = None
 _km_scaler = None
+_km_lock = threading.Lock()
 
 
 def _get_kmeans_model():
     global _km_model, _km_scaler
-    if _km_model is None:
-        logger.info("Training KMeans...")
-        rng = np.random.default_rng(0)
-        samples = [rng.normal(loc=c, scale=[4, 12, 8], size=(400, 3))
-                   for c in _KMEANS_CENTERS_RAW]
-        X = np.clip(np.vstack(samples), [-20, 0, 0], [50, 100, 120])
-        _km_scaler = StandardScaler()
-        Xs = _km_scaler.fit_transform(X)
-        _km_model = KMeans(n_clusters=4, n_init=5, random_state=0)
-        _km_model.fit(Xs)
-        logger.info("KMeans ready.")
+    if _km_model is not None:
+        return _km_model, _km_scaler
+    with _km_lock:
+        if _km_model is not None:
+            return _km_model, _km_scaler
+
+        # Built in locals and published last (scaler first, then the model
+        # that serves as the readiness guard), as in _get_logistic_model
+        cached = _load_artifact('kmeans')
+        if cached is not None:
+            scaler = _scaler_from(cached['mean'], cached['std'])
+            model = KMeans(n_clusters=4)
+            model.cluster_centers_ = cached['centers']
+            model.inertia_ = float(cached['inertia'])
+            logger.info("KMeans loaded from cache.")
+        else:
+            logger.info("Training KMeans...")
+            rng = np.random.default_rng(0)
+            samples = [rng.normal(loc=c, scale=[4, 12, 8], size=(400, 3))
+                       for c in _KMEANS_CENTERS_RAW]
+            X = np.clip(np.vstack(samples), [-20, 0, 0], [50, 100, 120])
+            scaler = StandardScaler()
+            Xs = scaler.fit_transform(X)
+            model = KMeans(n_clusters=4, n_init=5, random_state=0)
+            model.fit(Xs)
+            _save_artifact('kmeans', centers=model.cluster_centers_,
+                           inertia=np.array(model.inertia_),
+                           mean=scaler.mean_, std=scaler.std_)
+            logger.info("KMeans ready.")
+
+        _km_scaler = scaler
+        _km_model = model
     return _km_model, _km_scaler
 
 
 def predict_cluster(temp, humidity, wind):
     model, scaler = _get_kmeans_model()
-    feat = scaler.transform(np.array([[temp, humidity, wind]]))
-    cluster_id = int(model.predict(feat)[0])
-    center = model.cluster_centers_[cluster_id]
-    dist = float(np.linalg.norm(feat[0] - center))
+    feat = (np.array([temp, humidity, wind]) - scaler.mean_) / scaler.std_
+    # One pass gives both the assignment and the distance to the chosen center
+    diffs = feat - model.cluster_centers_
+    d2 = np.einsum('ij,ij->i', diffs, diffs)
+    cluster_id = int(d2.argmin())
+    dist = float(np.sqrt(d2[cluster_id]))
     confidence = round(max(0.0, min(100.0, 100.0 - dist * 20.0)), 1)
     return {
         'cluster_id': cluster_id,
@@ -388,6 +511,12 @@ def predict_cluster(temp, humidity, wind):
 #  MASTER ENTRY POINT
 # ════════════════════════════════════════════════════════════════════════════
 
+def preload_models():
+    """Load (or train) all models up front so no request pays the cost."""
+    _get_logistic_model()
+    _get_kmeans_model()
+
+
 def run_full_analysis(weather_payload):
     current = weather_payload.get('current', {})
     hourly  = weather_payload.get('hourly_24h', {})
@@ -6,12 +6,41 @@ Uses DuckDuckGo shopping search to find real product data.
 
 import logging
 import re
+from functools import lru_cache
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from lxml import etree
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Keep-alive session for DuckDuckGo so repeat scrapes reuse the TLS connection
+_SESSION = requests.Session()
+_SESSION.headers.update({**Config.HEADERS, 'Referer': 'https://duckduckgo.com/'})
+_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0))
+
+_PRICE_RE = re.compile(r'\$[\d,]+\.?\d*')
+
+# Only the first few result cards are used, so the page is parsed as it
+# streams in and the download stops once enough have been seen
+_MAX_RESULTS = 5
+_STREAM_CHUNK = 16384
+
+
+def _has_class(cls: str):
+    """XPath test for a whole class token (CSS '.cls'), relative to the context node."""
+    return etree.XPath(f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]")
+
+
+# (title, snippet, url) lookups within one result card
+_CARD_XPATHS = tuple(_has_class(c) for c in ('result__title', 'result__snippet', 'result__url'))
+
+
+def _text(el) -> str:
+    """Element text with each fragment stripped, like bs4's get_text(strip=True)."""
+    return ''.join(t.strip() for t in el.itertext())
+
+
 # Curated product data per clothing category (fallback when scraping unavailable)
 FALLBACK_PRODUCTS = {
     'heavy_cold': [
@@ -173,22 +202,23 @@ FALLBACK_PRODUCTS = {
 }
 
 
-def _category_from_clothing(clothing_primary: str, temp: float) -> str:
-    """Map clothing recommendation to product category key."""
-    p = clothing_primary.lower()
-    if 'thermal' in p or ('heavy' in p and 'jacket' in p and temp < 5):
+# Fallback lists pre-sliced to the three products a response shows
+_FALLBACK_TOP3 = {k: tuple(v[:3]) for k, v in FALLBACK_PRODUCTS.items()}
+
+
+# One alternation per category, in priority order; group n -> _CAT_BY_GROUP[n]
+_CAT_RE = re.compile(r'(thermal)|(heavy jacket)|(light jacket)|(sleeve|chino)|(t-shirt|jeans)|(cotton|summer|linen)')
+_CAT_BY_GROUP = (None, 'heavy_cold', 'cold', 'light_cold', 'mild', 'warm', 'summer')
+
+
+@lru_cache(maxsize=128)
+def _category_from_clothing(p: str, below_5c: bool) -> str:
+    """Map a lower-cased clothing recommendation to product category key."""
+    if below_5c and 'heavy' in p and 'jacket' in p:
         return 'heavy_cold'
-    if 'heavy jacket' in p:
-        return 'cold'
-    if 'light jacket' in p:
-        return 'light_cold'
-    if 'sleeve' in p or 'chino' in p:
-        return 'mild'
-    if 't-shirt' in p or 'jeans' in p:
-        return 'warm'
-    if 'cotton' in p or 'summer' in p or 'linen' in p:
-        return 'summer'
-    return 'mild'
+    # Single scan; the highest-priority (lowest-numbered) group found wins
+    groups = [m.lastindex for m in _CAT_RE.finditer(p)]
+    return _CAT_BY_GROUP[min(groups)] if groups else 'mild'
 
 
 def get_outfit_products(clothing_primary: str, temp: float) -> list:
@@ -196,9 +226,6 @@ def get_outfit_products(clothing_primary: str, temp: float) -> list:
     Return list of outfit product suggestions.
     Attempts live DuckDuckGo scrape; falls back to curated data.
     """
-    cat_key = _category_from_clothing(clothing_primary, temp)
-    products = FALLBACK_PRODUCTS.get(cat_key, FALLBACK_PRODUCTS['mild'])
-
     # Attempt to enrich with live data
     try:
         scraped = _scrape_fashion_products(clothing_primary)
@@ -207,7 +234,8 @@ def get_outfit_products(clothing_primary: str, temp: float) -> list:
     except Exception as e:
         logger.debug(f"Live scraping failed, using fallback: {e}")
 
-    return products[:3]
+    cat_key = _category_from_clothing(clothing_primary.lower(), temp < 5)
+    return list(_FALLBACK_TOP3.get(cat_key, _FALLBACK_TOP3['mild']))
 
 
 def _scrape_fashion_products(query: str) -> list:
@@ -218,32 +246,22 @@ def _scrape_fashion_products(query: str) -> list:
     search_url = 'https://duckduckgo.com/html/'
     params = {'q': f'{query} buy online', 'ia': 'shopping'}
 
-    resp = requests.get(
-        search_url,
-        params=params,
-        headers={**Config.HEADERS, 'Referer': 'https://duckduckgo.com/'},
-        timeout=8,
-    )
-    if not resp or resp.status_code != 200:
-        return []
+    with _SESSION.get(search_url, params=params, timeout=8, stream=True) as resp:
+        resp.raise_for_status()
+        cards = _stream_result_cards(resp)
 
-    soup = BeautifulSoup(resp.text, 'lxml')
     results = []
 
-    for item in soup.select('.result__body')[:5]:
-        title_el = item.select_one('.result__title')
-        snippet_el = item.select_one('.result__snippet')
-        link_el = item.select_one('.result__url')
-
-        if not title_el:
+    for title_el, snippet_el, link_el in cards:
+        if title_el is None:
             continue
 
-        title = title_el.get_text(strip=True)
-        snippet = snippet_el.get_text(strip=True) if snippet_el else ''
-        link = link_el.get_text(strip=True) if link_el else '#'
+        title = _text(title_el)
+        snippet = _text(snippet_el) if snippet_el is not None else ''
+        link = _text(link_el) if link_el is not None else '#'
 
         # Extract price from snippet
-        price_match = re.search(r'\$[\d,]+\.?\d*', snippet)
+        price_match = _PRICE_RE.search(snippet)
         price = price_match.group(0) if price_match else 'Check Price'
 
         if not link.startswith('http'):
@@ -259,3 +277,29 @@ def _scrape_fashion_products(query: str) -> list:
         })
 
     return results
+
+
+def _stream_result_cards(resp: requests.Response) -> list[tuple]:
+    """
+    Incrementally parse a streamed results page and return the
+    (title, snippet, url) elements of the first _MAX_RESULTS result cards.
+    Stops reading the body as soon as that many cards have closed.
+    """
+    parser = etree.HTMLPullParser(events=('end',), tag='div', encoding=resp.encoding)
+    cards = []
+
+    def collect() -> bool:
+        for _, el in parser.read_events():
+            if 'result__body' in (el.get('class') or '').split():
+                cards.append(tuple(next(iter(xp(el)), None) for xp in _CARD_XPATHS))
+                if len(cards) >= _MAX_RESULTS:
+                    return True
+        return False
+
+    for chunk in resp.iter_content(_STREAM_CHUNK):
+        parser.feed(chunk)
+        if collect():
+            return cards
+    parser.close()
+    collect()
+    return cards
@@ -6,9 +6,69 @@ Calculates Weather Risk Index indicators:
 - Humidity Discomfort Index
 - UV Risk
 - Wind Chill Risk
+
+Scalar functions score the current conditions; the ``*_np`` variants and
+``compute_hourly_risks`` apply the same formulas to whole hourly arrays.
 """
 
 import math
+from bisect import bisect_right
+import numpy as np
+
+# Risk bands: a value falls in band bisect_right(BOUNDS, value); each band is
+# (base score, level, label, color). Shared by the scalar and array scorers.
+_HEAT_BOUNDS = (27, 32, 38, 44)  # heat index °C
+_HEAT_LEVELS = (
+    (0, 'none', 'No Risk', '#22c55e'),
+    (20, 'low', 'Low', '#84cc16'),
+    (45, 'moderate', 'Moderate', '#eab308'),
+    (70, 'high', 'High', '#f97316'),
+    (90, 'extreme', 'Extreme', '#ef4444'),
+)
+
+_COLD_BOUNDS = (-25, -10, 0, 10)  # wind chill °C
+_COLD_LEVELS = (
+    (85, 'extreme', 'Extreme', '#4f46e5'),
+    (60, 'high', 'High', '#6366f1'),
+    (35, 'moderate', 'Moderate', '#818cf8'),
+    (15, 'low', 'Low', '#38bdf8'),
+    (0, 'none', 'No Risk', '#22c55e'),
+)
+
+_HUMIDEX_BOUNDS = (20, 30, 40, 45, 54)
+_HUMIDEX_LEVELS = (
+    (0, 'comfortable', 'Comfortable', '#22c55e'),
+    (20, 'little_discomfort', 'Little Discomfort', '#84cc16'),
+    (50, 'noticeable', 'Noticeable Discomfort', '#eab308'),
+    (72, 'evident', 'Evident Discomfort', '#f97316'),
+    (88, 'intense', 'Intense Discomfort', '#ef4444'),
+    (100, 'dangerous', 'Dangerous', '#dc2626'),
+)
+
+_HEATSTROKE_TIPS = {
+    'none': 'Conditions are comfortable.',
+    'low': 'Stay hydrated during outdoor activity.',
+    'moderate': 'Limit prolonged sun exposure. Drink water frequently.',
+    'high': 'Avoid strenuous outdoor activity. Seek shade and stay cool.',
+    'extreme': 'Danger: avoid all outdoor exposure. Stay in air conditioning.',
+}
+
+_COLD_TIPS = {
+    'none': 'Pleasant conditions for outdoor activity.',
+    'low': 'Wear a light jacket for extended outdoor time.',
+    'moderate': 'Layer up. Protect exposed skin.',
+    'high': 'Serious cold risk. Minimize outdoor exposure. Cover all skin.',
+    'extreme': 'Life-threatening wind chill. Do not go outdoors.',
+}
+
+_HUMIDITY_TIPS = {
+    'comfortable': 'Humidity levels are pleasant.',
+    'little_discomfort': 'Slight humidity. Generally fine.',
+    'noticeable': 'Noticeably humid. Light breathable clothing advised.',
+    'evident': 'Oppressively humid. Rest frequently and stay hydrated.',
+    'intense': 'Intense discomfort. Limit outdoor activity.',
+    'dangerous': 'Dangerous heat-humidity combination. Stay indoors.',
+}
 
 
 def heat_index(temp_c: float, humidity: float) -> float:
@@ -18,16 +78,11 @@ def heat_index(temp_c: float, humidity: float) -> float:
     if t < 80:
         return temp_c  # Heat index only meaningful above 80°F
 
+    # Rothfusz regression in Horner form: c0(t) + rh*(c1(t) + rh*c2(t))
     hi_f = (
-        -42.379
-        + 2.04901523 * t
-        + 10.14333127 * rh
-        - 0.22475541 * t * rh
-        - 0.00683783 * t ** 2
-        - 0.05481717 * rh ** 2
-        + 0.00122874 * t ** 2 * rh
-        + 0.00085282 * t * rh ** 2
-        - 0.00000199 * t ** 2 * rh ** 2
+        -42.379 + t * (2.04901523 - 0.00683783 * t)
+        + rh * (10.14333127 + t * (-0.22475541 + 0.00122874 * t)
+                + rh * (-0.05481717 + t * (0.00085282 - 0.00000199 * t)))
     )
     return (hi_f - 32) * 5 / 9
 
@@ -48,32 +103,7 @@ def calculate_heatstroke_risk(temp: float, humidity: float, uv_index: float = 0)
     hi = heat_index(temp, humidity)
     uv_contrib = min(uv_index * 2, 20)  # max 20 pts from UV
 
-    if hi < 27:
-        base = 0
-        level = 'none'
-        label = 'No Risk'
-        color = '#22c55e'
-    elif hi < 32:
-        base = 20
-        level = 'low'
-        label = 'Low'
-        color = '#84cc16'
-    elif hi < 38:
-        base = 45
-        level = 'moderate'
-        label = 'Moderate'
-        color = '#eab308'
-    elif hi < 44:
-        base = 70
-        level = 'high'
-        label = 'High'
-        color = '#f97316'
-    else:
-        base = 90
-        level = 'extreme'
-        label = 'Extreme'
-        color = '#ef4444'
-
+    base, level, label, color = _HEAT_LEVELS[bisect_right(_HEAT_BOUNDS, hi)]
     score = min(100, base + uv_contrib)
 
     return {
@@ -87,14 +117,7 @@ def calculate_heatstroke_risk(temp: float, humidity: float, uv_index: float = 0)
 
 
 def _heatstroke_tip(level: str) -> str:
-    tips = {
-        'none': 'Conditions are comfortable.',
-        'low': 'Stay hydrated during outdoor activity.',
-        'moderate': 'Limit prolonged sun exposure. Drink water frequently.',
-        'high': 'Avoid strenuous outdoor activity. Seek shade and stay cool.',
-        'extreme': 'Danger: avoid all outdoor exposure. Stay in air conditioning.',
-    }
-    return tips.get(level, '')
+    return _HEATSTROKE_TIPS.get(level, '')
 
 
 def calculate_cold_risk(temp: float, wind_kmh: float, humidity: float) -> dict:
@@ -102,32 +125,7 @@ def calculate_cold_risk(temp: float, wind_kmh: float, humidity: float) -> dict:
     wc = wind_chill(temp, wind_kmh)
     humidity_factor = max(0, (humidity - 60) * 0.2) if temp < 5 else 0  # wet cold worse
 
-    if wc >= 10:
-        base = 0
-        level = 'none'
-        label = 'No Risk'
-        color = '#22c55e'
-    elif wc >= 0:
-        base = 15
-        level = 'low'
-        label = 'Low'
-        color = '#38bdf8'
-    elif wc >= -10:
-        base = 35
-        level = 'moderate'
-        label = 'Moderate'
-        color = '#818cf8'
-    elif wc >= -25:
-        base = 60
-        level = 'high'
-        label = 'High'
-        color = '#6366f1'
-    else:
-        base = 85
-        level = 'extreme'
-        label = 'Extreme'
-        color = '#4f46e5'
-
+    base, level, label, color = _COLD_LEVELS[bisect_right(_COLD_BOUNDS, wc)]
     score = min(100, base + humidity_factor)
 
     return {
@@ -141,14 +139,7 @@ def calculate_cold_risk(temp: float, wind_kmh: float, humidity: float) -> dict:
 
 
 def _cold_tip(level: str) -> str:
-    tips = {
-        'none': 'Pleasant conditions for outdoor activity.',
-        'low': 'Wear a light jacket for extended outdoor time.',
-        'moderate': 'Layer up. Protect exposed skin.',
-        'high': 'Serious cold risk. Minimize outdoor exposure. Cover all skin.',
-        'extreme': 'Life-threatening wind chill. Do not go outdoors.',
-    }
-    return tips.get(level, '')
+    return _COLD_TIPS.get(level, '')
 
 
 def calculate_humidity_discomfort(temp: float, humidity: float) -> dict:
@@ -164,36 +155,7 @@ def calculate_humidity_discomfort(temp: float, humidity: float) -> dict:
 
     humidex = temp + (5 / 9) * (6.105 * math.exp(25.22 * (dew_point - 273.16) / dew_point) - 10)
 
-    if humidex < 20:
-        score = 0
-        level = 'comfortable'
-        label = 'Comfortable'
-        color = '#22c55e'
-    elif humidex < 30:
-        score = 20
-        level = 'little_discomfort'
-        label = 'Little Discomfort'
-        color = '#84cc16'
-    elif humidex < 40:
-        score = 50
-        level = 'noticeable'
-        label = 'Noticeable Discomfort'
-        color = '#eab308'
-    elif humidex < 45:
-        score = 72
-        level = 'evident'
-        label = 'Evident Discomfort'
-        color = '#f97316'
-    elif humidex < 54:
-        score = 88
-        level = 'intense'
-        label = 'Intense Discomfort'
-        color = '#ef4444'
-    else:
-        score = 100
-        level = 'dangerous'
-        label = 'Dangerous'
-        color = '#dc2626'
+    score, level, label, color = _HUMIDEX_LEVELS[bisect_right(_HUMIDEX_BOUNDS, humidex)]
 
     return {
         'score': min(100, max(0, round(score))),
@@ -207,15 +169,7 @@ def calculate_humidity_discomfort(temp: float, humidity: float) -> dict:
 
 
 def _humidity_tip(level: str) -> str:
-    tips = {
-        'comfortable': 'Humidity levels are pleasant.',
-        'little_discomfort': 'Slight humidity. Generally fine.',
-        'noticeable': 'Noticeably humid. Light breathable clothing advised.',
-        'evident': 'Oppressively humid. Rest frequently and stay hydrated.',
-        'intense': 'Intense discomfort. Limit outdoor activity.',
-        'dangerous': 'Dangerous heat-humidity combination. Stay indoors.',
-    }
-    return tips.get(level, '')
+    return _HUMIDITY_TIPS.get(level, '')
 
 
 def compute_all_risks(current: dict) -> dict:
@@ -230,3 +184,74 @@ def compute_all_risks(current: dict) -> dict:
         'cold_exposure': calculate_cold_risk(temp, wind, humidity),
         'humidity_discomfort': calculate_humidity_discomfort(temp, humidity),
     }
+
+
+# ════════════════════════════════════════════════════════════════════════════
+#  VECTORIZED (hourly arrays)
+# ════════════════════════════════════════════════════════════════════════════
+
+_HEAT_BINS = np.array(_HEAT_BOUNDS, dtype=float)
+_HEAT_BASE = np.array([band[0] for band in _HEAT_LEVELS])
+
+_COLD_BINS = np.array(_COLD_BOUNDS, dtype=float)
+_COLD_BASE = np.array([band[0] for band in _COLD_LEVELS])
+
+_HUMIDEX_BINS = np.array(_HUMIDEX_BOUNDS, dtype=float)
+_HUMIDEX_SCORE = np.array([band[0] for band in _HUMIDEX_LEVELS])
+
+
+def heat_index_np(temp_c: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """Array version of heat_index (°C)."""
+    t = temp_c * 9 / 5 + 32
+    rh = humidity
+    hi_f = (
+        -42.379 + t * (2.04901523 - 0.00683783 * t)
+        + rh * (10.14333127 + t * (-0.22475541 + 0.00122874 * t)
+                + rh * (-0.05481717 + t * (0.00085282 - 0.00000199 * t)))
+    )
+    return np.where(t < 80, temp_c, (hi_f - 32) * 5 / 9)
+
+
+def wind_chill_np(temp_c: np.ndarray, wind_kmh: np.ndarray) -> np.ndarray:
+    """Array version of wind_chill (°C)."""
+    v = np.power(wind_kmh, 0.16)
+    wc = np.round(13.12 + 0.6215 * temp_c - 11.37 * v + 0.3965 * temp_c * v, 1)
+    return np.where((temp_c >= 10) | (wind_kmh < 4.8), temp_c, wc)
+
+
+def humidex_np(temp_c: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """Array version of the humidex used by calculate_humidity_discomfort."""
+    a, b = 17.625, 243.04
+    gamma = (a * temp_c / (b + temp_c)) + np.log(np.maximum(humidity, 1) / 100.0)
+    dew_point = b * gamma / (a - gamma)
+    return temp_c + (5 / 9) * (6.105 * np.exp(25.22 * (dew_point - 273.16) / dew_point) - 10)
+
+
+def compute_hourly_risks(temps, humidity, wind) -> dict:
+    """
+    Risk scores (0–100) for each hourly sample, matching compute_all_risks
+    per point (hourly data carries no UV, so heatstroke excludes it).
+    Samples with missing inputs score as None.
+    """
+    n = min(len(temps), len(humidity), len(wind))
+    t = np.asarray(temps[:n], dtype=float)
+    rh = np.asarray(humidity[:n], dtype=float)
+    w = np.asarray(wind[:n], dtype=float)
+    valid = np.isfinite(t) & np.isfinite(rh) & np.isfinite(w)
+
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        heat = _HEAT_BASE[np.digitize(heat_index_np(t, rh), _HEAT_BINS)]
+
+        wet_cold = np.where(t < 5, np.maximum(0, (rh - 60) * 0.2), 0)
+        cold = np.minimum(100, _COLD_BASE[np.digitize(wind_chill_np(t, w), _COLD_BINS)] + wet_cold)
+
+        humid = _HUMIDEX_SCORE[np.digitize(humidex_np(t, rh), _HUMIDEX_BINS)]
+
+    def as_list(scores):
+        return [int(v) if ok else None for v, ok in zip(np.round(scores), valid)]
+
+    return {
+        'heatstroke': as_list(heat),
+        'cold_exposure': as_list(cold),
+        'humidity_discomfort': as_list(humid),
+    }
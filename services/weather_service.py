@@ -1,12 +1,147 @@
 import time
+import random
 import logging
+import functools
+import threading
 import requests
 import json
-from datetime import datetime, timedelta
+import numpy as np
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from requests.adapters import HTTPAdapter
 from config import Config
+from services.risk_service import compute_hourly_risks
+
+try:
+    import orjson
+    _json_loads = orjson.loads  # faster on Open-Meteo's float-heavy bodies
+except ImportError:
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Keep-alive session shared by all Open-Meteo calls; _make_request does its own
+# retries, so the adapter is left at max_retries=0.
+_SESSION = requests.Session()
+_SESSION.headers.update(Config.HEADERS)
+_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0))
+
+# Client errors that won't change on retry
+_NO_RETRY_STATUSES = frozenset({400, 401, 403, 404, 422})
+
+
+class _TTLCache:
+    """Size-bounded LRU map whose entries expire ``ttl`` seconds after insert."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def _ttl_cached(cache: _TTLCache, key: Callable):
+    """
+    Memoize a network lookup in ``cache`` under ``key(*args, **kwargs)``.
+    Failed lookups (None) are not cached; cached values are shared, treat as read-only.
+
+    Concurrent misses on the same key are single-flighted: the first caller
+    runs the lookup and the rest wait for its result (or exception), so a
+    cold key hit by many requests at once costs one upstream call.
+    """
+    def decorator(fn):
+        inflight = {}  # key -> Future of the lookup currently running
+        inflight_lock = threading.Lock()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs)
+            result = cache.get(k)
+            if result is not None:
+                return result
+
+            with inflight_lock:
+                future = inflight.get(k)
+                if future is None:
+                    # Re-check: a leader may have finished since the miss above
+                    result = cache.get(k)
+                    if result is not None:
+                        return result
+                    future = inflight[k] = Future()
+                    leader = True
+                else:
+                    leader = False
+
+            if not leader:
+                return future.result()
+
+            try:
+                result = fn(*args, **kwargs)
+                if result is not None:
+                    cache.set(k, result)
+                future.set_result(result)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with inflight_lock:
+                    inflight.pop(k, None)
+            return result
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+# Bounded fan-out for multi-city lookups
+_BATCH_POOL = ThreadPoolExecutor(max_workers=Config.BATCH_FANOUT, thread_name_prefix='wx-batch')
+
+_geo_cache = _TTLCache(maxsize=Config.GEOCODE_CACHE_SIZE, ttl=Config.GEOCODE_CACHE_TTL)
+_wx_cache = _TTLCache(maxsize=Config.WEATHER_CACHE_SIZE, ttl=Config.WEATHER_CACHE_TTL)
+
+
+def _round1(values) -> list[float]:
+    """Round a sequence to one decimal in a single vectorized pass."""
+    return np.round(np.asarray(values, dtype=np.float64), 1).tolist()
+
+
+# (epoch second, formatted UTC timestamp); swapped as one tuple so readers on
+# other threads never see a second paired with another second's string
+_ts_cache = (0, '')
+
+
+def _now_iso() -> str:
+    """Current UTC time as an ISO-8601 string, formatted at most once per second."""
+    global _ts_cache
+    s = int(time.time())
+    if s != _ts_cache[0]:
+        _ts_cache = (s, time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(s)))
+    return _ts_cache[1]
+
 
 def _make_request(url: str, params: dict = None, retries: int = None) -> requests.Response | None:
     """Make HTTP request with retry logic and timeout handling."""
@@ -15,10 +150,9 @@ def _make_request(url: str, params: dict = None, retries: int = None) -> request
 
     for attempt in range(retries):
         try:
-            resp = requests.get(
+            resp = _SESSION.get(
                 url,
                 params=params,
-                headers=Config.HEADERS,
                 timeout=Config.REQUEST_TIMEOUT,
             )
             resp.raise_for_status()
@@ -27,7 +161,7 @@ def _make_request(url: str, params: dict = None, retries: int = None) -> request
             logger.warning(f"Request timeout on attempt {attempt + 1}: {url}")
         except requests.exceptions.HTTPError as e:
             logger.warning(f"HTTP error {e.response.status_code} on attempt {attempt + 1}: {url}")
-            if e.response.status_code in (400, 404):
+            if e.response.status_code in _NO_RETRY_STATUSES:
                 return None  # No point retrying client errors
         except requests.exceptions.ConnectionError:
             logger.warning(f"Connection error on attempt {attempt + 1}: {url}")
@@ -35,11 +169,13 @@ def _make_request(url: str, params: dict = None, retries: int = None) -> request
             logger.error(f"Unexpected error on attempt {attempt + 1}: {e}")
 
         if attempt < retries - 1:
-            time.sleep(backoff * (attempt + 1))
+            # Exponential backoff with jitter so concurrent retries don't sync up
+            time.sleep(backoff * (2 ** attempt) + random.random() * backoff)
 
     return None
 
 
+@_ttl_cached(_geo_cache, key=lambda city_name: city_name.strip().lower())
 def geocode_city(city_name: str) -> dict | None:
     """Resolve city name to coordinates using Open-Meteo geocoding API."""
     resp = _make_request(
@@ -49,7 +185,7 @@ def geocode_city(city_name: str) -> dict | None:
     if not resp:
         return None
 
-    data = resp.json()
+    data = _json_loads(resp.content)
     results = data.get('results', [])
     if not results:
         return None
@@ -66,11 +202,24 @@ def geocode_city(city_name: str) -> dict | None:
     }
 
 
-def fetch_current_weather(lat: float, lon: float, timezone: str = 'UTC') -> dict | None:
-    """Fetch current weather + 7-day history via Open-Meteo."""
-    today = datetime.utcnow()
-    seven_days_ago = today - timedelta(days=7)
+def _today_hours(timezone: str) -> dict:
+    """
+    Hourly window covering the location's current day (local 00:00–23:00), the
+    same 24 rows the full 7-day series starts with. Open-Meteo counts
+    forecast_hours from the current hour, so the hours already past today are
+    requested via past_hours. Without tz data the window is left at the default.
+    """
+    try:
+        hour = datetime.now(ZoneInfo(timezone)).hour
+    except (KeyError, ValueError):  # ZoneInfoNotFoundError is a KeyError
+        return {}
+    return {'past_hours': hour, 'forecast_hours': 24 - hour}
+
 
+# Coordinates rounded to 2 decimals (~1 km) so nearby lookups share an entry
+@_ttl_cached(_wx_cache, key=lambda lat, lon, timezone='UTC': (round(lat, 2), round(lon, 2), timezone))
+def fetch_current_weather(lat: float, lon: float, timezone: str = 'UTC') -> dict | None:
+    """Fetch current conditions, the next 24 hours and a 7-day forecast via Open-Meteo."""
     params = {
         'latitude': lat,
         'longitude': lon,
@@ -90,6 +239,7 @@ def fetch_current_weather(lat: float, lon: float, timezone: str = 'UTC') -> dict
         ],
         'timezone': timezone,
         'forecast_days': 7,
+        **_today_hours(timezone),  # only today's 24 hourly samples are used
         'wind_speed_unit': 'kmh',
     }
 
@@ -97,57 +247,127 @@ def fetch_current_weather(lat: float, lon: float, timezone: str = 'UTC') -> dict
     if not resp:
         return None
 
-    return resp.json()
+    data = _json_loads(resp.content)
+    # Stamped here rather than at assembly, so payloads built from _wx_cache
+    # report when the forecast was actually fetched
+    data['fetched_at'] = _now_iso()
+    return data
+
+
+_WMO_DESCRIPTIONS = {
+    0: 'Clear Sky', 1: 'Mainly Clear', 2: 'Partly Cloudy', 3: 'Overcast',
+    45: 'Fog', 48: 'Icy Fog',
+    51: 'Light Drizzle', 53: 'Moderate Drizzle', 55: 'Dense Drizzle',
+    61: 'Slight Rain', 63: 'Moderate Rain', 65: 'Heavy Rain',
+    71: 'Slight Snow', 73: 'Moderate Snow', 75: 'Heavy Snow',
+    77: 'Snow Grains',
+    80: 'Slight Rain Showers', 81: 'Moderate Rain Showers', 82: 'Violent Rain Showers',
+    85: 'Slight Snow Showers', 86: 'Heavy Snow Showers',
+    95: 'Thunderstorm', 96: 'Thunderstorm with Hail', 99: 'Heavy Thunderstorm',
+}
+
+# (codes, day icon, night icon) — anything unlisted renders as 'cloudy'
+_ICON_GROUPS = (
+    ((0,), 'sunny', 'clear-night'),
+    ((1, 2), 'partly-cloudy', 'partly-cloudy'),
+    ((3,), 'cloudy', 'cloudy'),
+    ((45, 48), 'fog', 'fog'),
+    ((51, 53, 55, 61, 63, 65, 80, 81, 82), 'rain', 'rain'),
+    ((71, 73, 75, 77, 85, 86), 'snow', 'snow'),
+    ((95, 96, 99), 'thunderstorm', 'thunderstorm'),
+)
+_ICON_BY_CODE = {code: (day, night) for codes, day, night in _ICON_GROUPS for code in codes}
+_ICON_DEFAULT = ('cloudy', 'cloudy')
+
+# code -> (description, day icon, night icon): one lookup per forecast entry
+_WMO = {
+    code: (_WMO_DESCRIPTIONS.get(code, 'Unknown'), *_ICON_BY_CODE.get(code, _ICON_DEFAULT))
+    for code in _WMO_DESCRIPTIONS.keys() | _ICON_BY_CODE.keys()
+}
+_WMO_UNKNOWN = ('Unknown', *_ICON_DEFAULT)
 
 
 def parse_wmo_code(code: int) -> str:
     """Convert WMO weather code to human-readable description."""
-    wmo_map = {
-        0: 'Clear Sky', 1: 'Mainly Clear', 2: 'Partly Cloudy', 3: 'Overcast',
-        45: 'Fog', 48: 'Icy Fog',
-        51: 'Light Drizzle', 53: 'Moderate Drizzle', 55: 'Dense Drizzle',
-        61: 'Slight Rain', 63: 'Moderate Rain', 65: 'Heavy Rain',
-        71: 'Slight Snow', 73: 'Moderate Snow', 75: 'Heavy Snow',
-        77: 'Snow Grains',
-        80: 'Slight Rain Showers', 81: 'Moderate Rain Showers', 82: 'Violent Rain Showers',
-        85: 'Slight Snow Showers', 86: 'Heavy Snow Showers',
-        95: 'Thunderstorm', 96: 'Thunderstorm with Hail', 99: 'Heavy Thunderstorm',
-    }
-    return wmo_map.get(code, 'Unknown')
+    return _WMO_DESCRIPTIONS.get(code, 'Unknown')
 
 
 def get_weather_icon_key(code: int, is_day: int = 1) -> str:
     """Map WMO code to icon key for frontend SVG system."""
-    if code == 0:
-        return 'sunny' if is_day else 'clear-night'
-    if code in (1, 2):
-        return 'partly-cloudy'
-    if code == 3:
-        return 'cloudy'
-    if code in (45, 48):
-        return 'fog'
-    if code in (51, 53, 55, 61, 63, 65, 80, 81, 82):
-        return 'rain'
-    if code in (71, 73, 75, 77, 85, 86):
-        return 'snow'
-    if code in (95, 96, 99):
-        return 'thunderstorm'
-    return 'cloudy'
-
-
-def build_weather_payload(city_name: str) -> dict | None:
+    return _ICON_BY_CODE.get(code, _ICON_DEFAULT)[0 if is_day else 1]
+
+
+def describe_wmo_code(code: int, is_day: int = 1) -> tuple[str, str]:
+    """Return (description, icon key) for a WMO code in a single lookup."""
+    desc, icon_day, icon_night = _WMO.get(code, _WMO_UNKNOWN)
+    return desc, icon_day if is_day else icon_night
+
+
+def build_weather_payload(city_name: str, on_geocoded: Callable[[dict], None] | None = None) -> dict | None:
     """
     Main entry point: geocode city then fetch all weather data.
     Returns structured dict ready for API response.
+
+    ``on_geocoded`` is called with the resolved location before the forecast
+    request goes out, so callers can start work that only needs the city
+    (e.g. content scraping) while the forecast is in flight.
     """
     geo = geocode_city(city_name)
     if not geo:
         return None
 
+    if on_geocoded is not None:
+        on_geocoded(geo)
+
+    return _payload_for(geo)
+
+
+def build_weather_payload_by_coords(lat: float, lon: float, tz: str = 'UTC', name: str = '') -> dict | None:
+    """
+    Fast path for callers that already hold coordinates (e.g. from an earlier
+    geocode): skips the geocoding round-trip and fetches the forecast directly.
+    """
+    geo = {
+        'name': name,
+        'country': '',
+        'country_code': '',
+        'latitude': lat,
+        'longitude': lon,
+        'timezone': tz,
+        'admin1': '',
+    }
+    return _payload_for(geo)
+
+
+def build_many(cities: list[str]) -> list[dict]:
+    """
+    Build payloads for several cities concurrently, so wall time tracks the
+    slowest city rather than the sum. Cities that fail to resolve are omitted;
+    the rest keep their input order.
+    """
+    futures = [_BATCH_POOL.submit(build_weather_payload, city) for city in cities]
+    payloads = []
+    for city, future in zip(cities, futures):
+        try:
+            payload = future.result()
+        except Exception as e:
+            logger.error(f"Batch weather fetch failed for {city}: {e}")
+            continue
+        if payload:
+            payloads.append(payload)
+    return payloads
+
+
+def _payload_for(geo: dict) -> dict | None:
+    """Fetch the forecast for a resolved location and assemble the payload."""
     raw = fetch_current_weather(geo['latitude'], geo['longitude'], geo.get('timezone', 'UTC'))
     if not raw:
         return None
+    return _assemble(geo, raw)
+
 
+def _assemble(geo: dict, raw: dict) -> dict:
+    """Shape a raw Open-Meteo forecast for ``geo`` into the API payload."""
     current = raw.get('current', {})
     hourly = raw.get('hourly', {})
     daily = raw.get('daily', {})
@@ -165,6 +385,8 @@ def build_weather_payload(city_name: str) -> dict | None:
     is_day = current.get('is_day', 1)
     precip = current.get('precipitation', 0)
 
+    description, icon_key = describe_wmo_code(weather_code, is_day)
+
     # Next 24-hour hourly data for ML
     temps_24h = hourly.get('temperature_2m', [])[:24]
     humidity_24h = hourly.get('relative_humidity_2m', [])[:24]
@@ -173,25 +395,33 @@ def build_weather_payload(city_name: str) -> dict | None:
     apparent_24h = hourly.get('apparent_temperature', [])[:24]
     hourly_times = hourly.get('time', [])[:24]
 
-    # 7-day forecast
+    # 7-day forecast — Open-Meteo returns equal-length daily arrays, so any
+    # short array is padded once up front and the loop needs no index guards
+    n_days = min(7, len(daily.get('time', [])))
+
+    def _daily(key, fill):
+        values = daily.get(key, [])[:n_days]
+        return values + [fill] * (n_days - len(values))
+
     daily_forecast = []
-    d_times = daily.get('time', [])
-    d_max = daily.get('temperature_2m_max', [])
-    d_min = daily.get('temperature_2m_min', [])
-    d_codes = daily.get('weather_code', [])
-    d_precip = daily.get('precipitation_sum', [])
-    d_wind = daily.get('wind_speed_10m_max', [])
-
-    for i in range(min(7, len(d_times))):
+    for date, t_max, t_min, code, precip_sum, wind_max in zip(
+        _daily('time', ''),
+        _round1(_daily('temperature_2m_max', temp)),
+        _round1(_daily('temperature_2m_min', temp - 5)),
+        _daily('weather_code', 0),
+        _round1(_daily('precipitation_sum', 0)),
+        _round1(_daily('wind_speed_10m_max', wind_speed)),
+    ):
+        day_description, day_icon_key = describe_wmo_code(code)
         daily_forecast.append({
-            'date': d_times[i] if i < len(d_times) else '',
-            'temp_max': round(d_max[i], 1) if i < len(d_max) else temp,
-            'temp_min': round(d_min[i], 1) if i < len(d_min) else temp - 5,
-            'weather_code': d_codes[i] if i < len(d_codes) else 0,
-            'description': parse_wmo_code(d_codes[i] if i < len(d_codes) else 0),
-            'icon_key': get_weather_icon_key(d_codes[i] if i < len(d_codes) else 0),
-            'precipitation_sum': round(d_precip[i], 1) if i < len(d_precip) else 0,
-            'wind_max': round(d_wind[i], 1) if i < len(d_wind) else wind_speed,
+            'date': date,
+            'temp_max': t_max,
+            'temp_min': t_min,
+            'weather_code': code,
+            'description': day_description,
+            'icon_key': day_icon_key,
+            'precipitation_sum': precip_sum,
+            'wind_max': wind_max,
         })
 
     return {
@@ -211,8 +441,8 @@ def build_weather_payload(city_name: str) -> dict | None:
             'wind_speed': round(wind_speed, 1),
             'wind_direction': wind_dir,
             'weather_code': weather_code,
-            'description': parse_wmo_code(weather_code),
-            'icon_key': get_weather_icon_key(weather_code, is_day),
+            'description': description,
+            'icon_key': icon_key,
             'pressure': round(pressure, 1),
             'visibility': round(visibility / 1000, 1),  # km
             'uv_index': uv_index,
@@ -222,12 +452,13 @@ def build_weather_payload(city_name: str) -> dict | None:
         },
         'hourly_24h': {
             'times': hourly_times,
-            'temperatures': [round(t, 1) for t in temps_24h],
+            'temperatures': _round1(temps_24h),
             'humidity': humidity_24h,
-            'wind_speeds': [round(w, 1) for w in wind_24h],
+            'wind_speeds': _round1(wind_24h),
             'precipitation_probability': precip_prob_24h,
-            'apparent_temperatures': [round(t, 1) for t in apparent_24h],
+            'apparent_temperatures': _round1(apparent_24h),
         },
+        'hourly_risks': compute_hourly_risks(temps_24h, humidity_24h, wind_24h),
         'daily_forecast': daily_forecast,
-        'fetched_at': datetime.utcnow().isoformat(),
+        'fetched_at': raw.get('fetched_at') or _now_iso(),
     }